@@ -0,0 +1,388 @@
+# carga_vendas.py - teste de carga do caminho de venda (`make carga`).
+# Sobe o gunicorn como no Dockerfile contra um mongod local, loga N colaboradores e dispara
+# vendas simultâneas em M eventos. Os dados de teste levam 'carga': True e são refeitos a
+# cada execução; só aceita mongod em localhost.
+#   python carga_vendas.py --mongo mongodb://127.0.0.1:27017 --vendas 5000 --workers 4
+
+import http.cookiejar
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import bcrypt
+import click
+from bson.decimal128 import Decimal128
+from pymongo import MongoClient
+from pymongo.errors import OperationFailure
+from pymongo.uri_parser import parse_uri
+
+MONGO_CARGA = os.environ.get('MONGO_CARGA', 'mongodb://127.0.0.1:27017')
+# O import do app abre a conexão de controle: que seja com o mongod do teste, nunca o de produção
+os.environ.setdefault('MONGODB_URI_CONTROL', MONGO_CARGA)
+os.environ.setdefault('MONGO_TLS', '0')
+os.environ.setdefault('JOBS_WORKER', '0')
+
+from app import (BASE_DIR, CAMPOS_PERIODO_RESUMO, DB_CONTROL_NAME, DB_NAME_VENDAS, MONGO_PASSWORD,  # noqa: E402
+                 VENDA_JOURNAL_INTERVALO, cartelas_sobrepostas, reservar_faixa_sequencia)
+
+CARGA_USUARIO_MONGO = 'carga'
+CARGA_SENHA = 'Carga'
+CARGA_LOG_SERVIDOR = os.path.join(tempfile.gettempdir(), 'carga_vendas_gunicorn.log')
+
+
+def _percentil(valores, p):
+    """Percentil p (0-100) pelo posto mais próximo; 0 sem valores."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[max(0, -(-len(ordenados) * p // 100) - 1)]
+
+
+def _preparar_carga(cliente_mongo, id_sala, endereco, colaboradores, eventos, clientes, numero_maximo, usa_resumo):
+    """Recria sala, colaboradores, clientes e eventos de teste; devolve (nicks, [(ObjectId str, id_evento)], ids_clientes)."""
+    # A URI da sala é url_parte1 + senha + url_parte2: um usuário local com a senha das salas
+    papeis = [{'role': 'readWrite', 'db': DB_NAME_VENDAS}]
+    try:
+        cliente_mongo.admin.command('createUser', CARGA_USUARIO_MONGO, pwd=MONGO_PASSWORD, roles=papeis)
+    except OperationFailure as e:
+        if e.code != 51003:  # usuário já existe
+            raise
+        cliente_mongo.admin.command('updateUser', CARGA_USUARIO_MONGO, pwd=MONGO_PASSWORD, roles=papeis)
+    cliente_mongo[DB_CONTROL_NAME].salas.update_one(
+        {'id_sala': id_sala},
+        {'$set': {
+            'url_parte1': f"mongodb://{CARGA_USUARIO_MONGO}:",
+            'url_parte2': f"@{endereco}/?authSource=admin",
+            'nome_sala': 'TESTE DE CARGA',
+            'carga': True,
+        }},
+        upsert=True
+    )
+
+    db = cliente_mongo[DB_NAME_VENDAS]
+    for evento in db.eventos.find({'carga': True}, {'id_evento': 1}):
+        db.drop_collection(f"vendas{evento['id_evento']}")
+        db.controle_venda.delete_many({'id_evento': evento['id_evento']})
+        db.resumo_vendas_cliente.delete_many({'id_evento': evento['id_evento']})
+    for colecao in ('eventos', 'colaboradores', 'clientes'):
+        db[colecao].delete_many({'carga': True})
+
+    agora = datetime.utcnow()
+    senha = bcrypt.hashpw(CARGA_SENHA.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    primeiro = reservar_faixa_sequencia(db, 'id_colaborador_global', colaboradores)
+    nicks = [f"Carga{primeiro + i}" for i in range(colaboradores)]
+    db.colaboradores.insert_many([
+        {'id_colaborador': primeiro + i, 'nome_colaborador': nick, 'nick': nick, 'senha': senha,
+         'nivel': 1, 'comissao': 20, 'carga': True}
+        for i, nick in enumerate(nicks)
+    ])
+
+    primeiro = reservar_faixa_sequencia(db, 'id_clientes_global', clientes)
+    ids_clientes = list(range(primeiro, primeiro + clientes))
+    db.clientes.insert_many([
+        {'id_cliente': id_cliente, 'nome_cliente': f"Cliente Carga {id_cliente}", 'nick': f"ClienteCarga{id_cliente}",
+         'telefone': '', 'data_cadastro': agora, 'carga': True}
+        for id_cliente in ids_clientes
+    ])
+
+    primeiro = reservar_faixa_sequencia(db, 'id_evento_global', eventos)
+    documentos = [{
+        'id_evento': id_evento,
+        'data_evento': agora.strftime('%d/%m/%Y'),
+        'hora_evento': '20:00',
+        'data_hora_evento': agora.replace(hour=20, minute=0, second=0, microsecond=0),
+        'descricao': f"Carga {id_evento}",
+        'unidade_de_venda': 1,
+        'tipo_de_cartela': 15,
+        'valor_de_venda': Decimal128('10.00'),
+        'numero_inicial': 1,
+        'numero_maximo': numero_maximo,
+        'status': 'ativo',
+        'data_ativado': agora,
+        'data_cadastro': agora,
+        'resumo_clientes': usa_resumo,
+        'carga': True,
+    } for id_evento in range(primeiro, primeiro + eventos)]
+    db.eventos.insert_many(documentos)
+    return nicks, [(str(doc['_id']), doc['id_evento']) for doc in documentos], ids_clientes
+
+
+def _comando_gunicorn_carga(bind, workers):
+    """CMD do Dockerfile com o --bind (e opcionalmente --workers) trocado."""
+    comando = ['gunicorn', '--bind', '0.0.0.0:8080', '--workers', '4', '--timeout', '120', 'app:app']
+    try:
+        with open(os.path.join(BASE_DIR, 'Dockerfile'), encoding='utf-8') as f:
+            for linha in f:
+                if linha.startswith('CMD [') and 'gunicorn' in linha:
+                    comando = json.loads(linha[len('CMD '):])
+    except (OSError, ValueError) as e:
+        print(f"[CARGA] Dockerfile ilegível ({e}); usando o comando padrão do gunicorn.")
+    comando[comando.index('--bind') + 1] = bind
+    if workers:
+        comando[comando.index('--workers') + 1] = str(workers)
+    return [sys.executable, '-m'] + comando
+
+
+class _SemRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class _SessaoCarga:
+    """Um colaborador logado: cookie de sessão próprio; redirects voltam sem ser seguidos."""
+
+    def __init__(self, url_base, id_sala):
+        self.url_base = url_base
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _SemRedirect())
+        self._abrir(f"/?id_sala={id_sala}")
+
+    def _abrir(self, caminho, dados=None):
+        corpo = urlencode(dados).encode('utf-8') if dados is not None else None
+        try:
+            with self.opener.open(self.url_base + caminho, corpo, timeout=130) as resposta:
+                resposta.read()
+                return resposta.status, resposta.headers
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers
+
+    def login(self, nick):
+        status, cabecalhos = self._abrir('/login', {'nome': nick, 'senha': CARGA_SENHA})
+        destino = cabecalhos.get('Location', '')
+        if status != 302 or not urlsplit(destino).path.endswith('/menu'):
+            raise RuntimeError(f"login de {nick} falhou (HTTP {status} -> {destino})")
+
+    def vender(self, id_evento, id_cliente, quantidade):
+        """(ms, erro ou None, {etapa: ms}) de um POST /processar_venda."""
+        inicio = time.perf_counter()
+        status, cabecalhos = self._abrir('/processar_venda', {
+            'id_evento': id_evento, 'id_cliente_final': id_cliente, 'quantidade': quantidade})
+        ms = (time.perf_counter() - inicio) * 1000
+        if status != 302:
+            return ms, f"HTTP {status}", {}
+        erro = parse_qs(urlsplit(cabecalhos.get('Location', '')).query).get('error', [None])[0]
+        etapas = {}
+        for item in (cabecalhos.get('Server-Timing') or '').split(','):
+            nome, _, duracao = item.strip().partition(';dur=')
+            if duracao:
+                etapas[nome] = float(duracao)
+        return ms, erro, etapas
+
+
+def _disparar_vendas_carga(sessoes, plano):
+    """Cada sessão (uma thread) tira a próxima venda do plano; devolve [(id_evento, ms, erro, etapas, falha_http)]."""
+    pendentes = iter(plano)
+    trava = threading.Lock()
+    resultados = []
+
+    def executar(sessao):
+        while True:
+            with trava:
+                item = next(pendentes, None)
+            if item is None:
+                return
+            (id_evento_mongo, id_evento), id_cliente, quantidade = item
+            try:
+                ms, erro, etapas = sessao.vender(id_evento_mongo, id_cliente, quantidade)
+                falha_http = bool(erro) and erro.startswith('HTTP ')
+            except Exception as e:
+                ms, erro, etapas, falha_http = None, f"{type(e).__name__}: {e}", {}, True
+            resultados.append((id_evento, ms, erro, etapas, falha_http))
+
+    with ThreadPoolExecutor(max_workers=len(sessoes)) as executor:
+        list(executor.map(executar, sessoes))
+    return resultados
+
+
+def _conferir_carga(db, eventos_carga, sucessos_por_evento, houve_falha, espera, journal):
+    """Confere vendas{N}, numeração e resumos dos eventos de teste; devolve a lista de problemas."""
+    problemas = []
+    ids_venda = {}
+    for _, id_evento in eventos_carga:
+        esperadas = sucessos_por_evento.get(id_evento, 0)
+        colecao = db[f"vendas{id_evento}"]
+        # Com VENDA_JOURNAL=1 as vendas chegam ao Mongo pelo descarregador, em segundo plano
+        limite = time.monotonic() + espera
+        while colecao.count_documents({}) < esperadas and time.monotonic() < limite:
+            time.sleep(0.5)
+
+        campos = {'_id': 0, 'quantidade_cartelas': 1, **{campo: 1 for campo in CAMPOS_PERIODO_RESUMO}}
+        vendas = list(colecao.find({}, campos))
+        evento = db.eventos.find_one({'id_evento': id_evento}, {'numero_inicial': 1, 'numero_maximo': 1, 'resumo_clientes': 1})
+        numero_inicial = int(evento.get('numero_inicial', 1))
+        total_cartelas = sum(venda['quantidade_cartelas'] for venda in vendas)
+        for venda in vendas:
+            if venda['id_venda'] in ids_venda:
+                problemas.append(f"{venda['id_venda']} repetida (eventos {ids_venda[venda['id_venda']]} e {id_evento})")
+            ids_venda[venda['id_venda']] = id_evento
+
+        linha = f"   Evento {id_evento}: {len(vendas)} venda(s), {total_cartelas} cartela(s)"
+        if len(vendas) != esperadas:
+            problemas.append(f"evento {id_evento}: {len(vendas)} venda(s) no Mongo para {esperadas} confirmada(s) ao cliente")
+        if total_cartelas <= int(evento.get('numero_maximo', 72000)) - numero_inicial + 1:
+            faixas = [tuple(venda.get(campo, 0) for campo in CAMPOS_PERIODO_RESUMO[1:]) for venda in vendas]
+            sobrepostas, vistos = cartelas_sobrepostas(faixas)
+            if sobrepostas:
+                problemas.append(f"evento {id_evento}: {len(sobrepostas)} cartela(s) em mais de uma venda, "
+                                 f"ex.: {[numero for numero, _, _ in sobrepostas[:10]]}")
+            linha += f", {len(sobrepostas)} sobreposta(s)"
+            # Com journal, cada worker arrenda blocos de cartelas e as sobras ficam sem vender: buraco legítimo
+            if not journal:
+                # Venda que falhou depois de reservar a numeração também deixa buraco legítimo
+                faltando = set(range(numero_inicial, numero_inicial + total_cartelas)) - vistos.keys()
+                if faltando and not houve_falha:
+                    problemas.append(f"evento {id_evento}: {len(faltando)} cartela(s) puladas, ex.: {sorted(faltando)[:10]}")
+                linha += f", {len(faltando)} pulada(s)"
+        else:
+            linha += " (deu a volta na numeração: sobreposição não conferida)"
+
+        if evento.get('resumo_clientes'):
+            no_resumo = sum(resumo.get('quantidade_cartelas', 0)
+                            for resumo in db.resumo_vendas_cliente.find({'id_evento': id_evento}, {'quantidade_cartelas': 1}))
+            if no_resumo != total_cartelas:
+                problemas.append(f"evento {id_evento}: resumos somam {no_resumo} cartela(s), vendas{id_evento} tem {total_cartelas}")
+            linha += f", resumos {'ok' if no_resumo == total_cartelas else 'divergentes'}"
+        click.echo(linha + '.')
+    return problemas
+
+
+@click.command()
+@click.option('--mongo', default=MONGO_CARGA, show_default=True, help="mongod local (sem TLS) usado pelo teste.")
+@click.option('--sala', 'id_sala', default='carga', show_default=True, help="id_sala criada para o teste.")
+@click.option('--colaboradores', default=8, show_default=True, help="Colaboradores logados (uma sessão/thread cada).")
+@click.option('--eventos', default=4, show_default=True, help="Eventos entre os quais as vendas se dividem.")
+@click.option('--clientes', default=200, show_default=True, help="Clientes sorteados nas vendas.")
+@click.option('--vendas', default=2000, show_default=True, help="Vendas medidas.")
+@click.option('--aquecimento', default=50, show_default=True, help="Vendas antes da medição (conexões, blocos de IDs).")
+@click.option('--max-quantidade', default=5, show_default=True, help="Unidades por venda: sorteado entre 1 e este valor.")
+@click.option('--numero-maximo', default=72000, show_default=True, help="numero_maximo dos eventos de teste.")
+@click.option('--resumo/--sem-resumo', default=True, show_default=True, help="Eventos com resumo por cliente.")
+@click.option('--workers', type=int, default=None, help="Workers do gunicorn (padrão: o do Dockerfile).")
+@click.option('--porta', default=8089, show_default=True, help="Porta do gunicorn do teste.")
+@click.option('--url', default=None, help="Usar um servidor já no ar (ex.: o container) em vez de subir o gunicorn.")
+@click.option('--journal/--sem-journal', default=os.environ.get('VENDA_JOURNAL', '0') == '1', show_default=True,
+              help="Servidor com VENDA_JOURNAL=1 (padrão: o do ambiente).")
+@click.option('--semente', type=int, default=None, help="Semente do sorteio de eventos, clientes e quantidades.")
+def vendas_carga(mongo, id_sala, colaboradores, eventos, clientes, vendas, aquecimento, max_quantidade,
+                 numero_maximo, resumo, workers, porta, url, journal, semente):
+    """
+    Teste de carga de /processar_venda: vendas/s, latência p50/p95/p99, tempo por etapa
+    (Server-Timing), rejeições (redirect com erro) e conferência da numeração no Mongo.
+    """
+    hosts = parse_uri(mongo)['nodelist']
+    if len(hosts) != 1 or hosts[0][0] not in ('localhost', '127.0.0.1'):
+        raise click.ClickException("O teste de carga apaga e recria dados: use um mongod em localhost.")
+    cliente_mongo = MongoClient(mongo, serverSelectionTimeoutMS=5000)
+    try:
+        cliente_mongo.admin.command('ping')
+    except Exception as e:
+        raise click.ClickException(f"mongod {mongo} indisponível: {e}")
+    db = cliente_mongo[DB_NAME_VENDAS]
+
+    nicks, eventos_carga, ids_clientes = _preparar_carga(
+        cliente_mongo, id_sala, f"{hosts[0][0]}:{hosts[0][1]}", colaboradores, eventos, clientes, numero_maximo, resumo)
+    click.echo(f"🧪 Sala '{id_sala}': {colaboradores} colaborador(es), {len(eventos_carga)} evento(s), {clientes} cliente(s).")
+
+    servidor = None
+    if url is None:
+        url = f"http://127.0.0.1:{porta}"
+        comando = _comando_gunicorn_carga(f"127.0.0.1:{porta}", workers)
+        ambiente = dict(os.environ, MONGODB_URI_CONTROL=mongo, MONGO_TLS='0', JOBS_WORKER='0', FLASK_ENV='production',
+                        VENDA_JOURNAL='1' if journal else '0')
+        log_servidor = open(CARGA_LOG_SERVIDOR, 'w')
+        servidor = subprocess.Popen(comando, cwd=BASE_DIR, env=ambiente, stdout=log_servidor, stderr=subprocess.STDOUT)
+        click.echo(f"🐍 {' '.join(comando[2:])} (log: {CARGA_LOG_SERVIDOR})")
+    try:
+        limite = time.monotonic() + 60
+        while True:
+            try:
+                with urllib.request.urlopen(url + '/', timeout=5) as resposta:
+                    resposta.read()
+                break
+            except (urllib.error.URLError, OSError):
+                if servidor is not None and servidor.poll() is not None:
+                    raise click.ClickException(f"gunicorn saiu com código {servidor.returncode}; veja {CARGA_LOG_SERVIDOR}.")
+                if time.monotonic() > limite:
+                    raise click.ClickException(f"Servidor {url} não respondeu em 60s.")
+                time.sleep(0.5)
+
+        def entrar(nick):
+            sessao = _SessaoCarga(url, id_sala)
+            sessao.login(nick)
+            return sessao
+
+        try:
+            with ThreadPoolExecutor(max_workers=colaboradores) as executor:
+                sessoes = list(executor.map(entrar, nicks))
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+
+        sorteio = random.Random(semente)
+
+        def sortear(quantidade):
+            return [(sorteio.choice(eventos_carga), sorteio.choice(ids_clientes), sorteio.randint(1, max_quantidade))
+                    for _ in range(quantidade)]
+
+        resultados = _disparar_vendas_carga(sessoes, sortear(aquecimento))
+        inicio = time.perf_counter()
+        medidos = _disparar_vendas_carga(sessoes, sortear(vendas))
+        segundos = time.perf_counter() - inicio
+        resultados += medidos
+    finally:
+        if servidor is not None:
+            servidor.terminate()
+            try:
+                servidor.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                servidor.kill()
+            log_servidor.close()
+
+    ok = [(ms, etapas) for _, ms, erro, etapas, _ in medidos if not erro]
+    rejeicoes = {}
+    falhas = {}
+    for _, _, erro, _, falha_http in medidos:
+        if erro:
+            destino = falhas if falha_http else rejeicoes
+            destino[erro] = destino.get(erro, 0) + 1
+    latencias = [ms for ms, _ in ok]
+    click.echo(f"📊 {len(medidos)} venda(s) em {segundos:.2f}s com {colaboradores} sessão(ões): {len(ok)} ok "
+               f"({len(ok) / segundos:.1f} vendas/s), {sum(rejeicoes.values())} rejeitada(s), {sum(falhas.values())} falha(s).")
+    click.echo(f"   Latência (ms): p50 {_percentil(latencias, 50):.0f}  p95 {_percentil(latencias, 95):.0f}  "
+               f"p99 {_percentil(latencias, 99):.0f}  máx {max(latencias, default=0):.0f}")
+    nomes_etapas = list(dict.fromkeys(nome for _, etapas in ok for nome in etapas))
+    if nomes_etapas:
+        click.echo("   Etapas no servidor (ms p50/p95/p99): " + '  '.join(
+            f"{nome} {_percentil(v, 50):.0f}/{_percentil(v, 95):.0f}/{_percentil(v, 99):.0f}"
+            for nome in nomes_etapas
+            for v in [[etapas[nome] for _, etapas in ok if nome in etapas]]))
+    for titulo, contagem in (('Rejeições (redirect com erro)', rejeicoes), ('Falhas (HTTP/conexão)', falhas)):
+        if contagem:
+            click.echo(f"   {titulo}:")
+            for erro, vezes in sorted(contagem.items(), key=lambda item: -item[1]):
+                click.echo(f"     {vezes:6d}x {erro}")
+
+    sucessos_por_evento = {}
+    for id_evento, _, erro, _, _ in resultados:
+        if not erro:
+            sucessos_por_evento[id_evento] = sucessos_por_evento.get(id_evento, 0) + 1
+    houve_falha = any(erro for _, _, erro, _, _ in resultados)
+    click.echo("🔎 Conferindo a numeração no Mongo...")
+    problemas = _conferir_carga(db, eventos_carga, sucessos_por_evento, houve_falha,
+                                espera=VENDA_JOURNAL_INTERVALO * 30 if journal else 0, journal=journal)
+    if problemas:
+        raise click.ClickException('; '.join(problemas))
+    click.echo("✅ Numeração conferida: nenhuma cartela ou ID de venda repetido.")
+
+
+if __name__ == '__main__':
+    vendas_carga()
@@ -0,0 +1,48 @@
+# gunicorn.conf.py - carregado automaticamente pelo Gunicorn (arquivo no diretório de trabalho).
+# Os parâmetros de linha de comando (bind, workers, timeout) continuam valendo;
+# aqui ficam os hooks que sobem/derrubam o worker da fila de jobs junto com o servidor
+# e o que mede o boot de cada worker.
+
+import os
+import subprocess
+import sys
+import time
+
+_worker_jobs = None
+
+
+def when_ready(server):
+    """
+    Sobe `flask jobs worker` (processo separado; JOBS_WORKER=0 desliga).
+    Memória: o worker abre JOBS_CONCORRENCIA executores, e cada executor um pool de
+    PDF_PROCESSOS // JOBS_CONCORRENCIA processos de renderização (~60 MB de RSS cada).
+    Com PDF_PROCESSOS=1 (padrão com menos de 2 CPUs) não há pool.
+    """
+    global _worker_jobs
+    if os.environ.get('JOBS_WORKER', '1') == '0':
+        return
+    _worker_jobs = subprocess.Popen(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'jobs', 'worker'],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    server.log.info("[JOBS] Worker da fila iniciado (pid %s).", _worker_jobs.pid)
+
+
+def on_exit(server):
+    """Encerra o worker da fila (termina o job em andamento antes de sair)."""
+    if _worker_jobs is None or _worker_jobs.poll() is not None:
+        return
+    _worker_jobs.terminate()
+    try:
+        _worker_jobs.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        _worker_jobs.kill()
+
+
+def post_fork(server, worker):
+    worker.inicio_boot = time.monotonic()
+
+
+def post_worker_init(worker):
+    """Loga o tempo do fork até o worker aceitar requests (inclui o import do app)."""
+    worker.log.info("[BOOT] Worker %s pronto em %.2fs.", worker.pid, time.monotonic() - worker.inicio_boot)
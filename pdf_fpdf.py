@@ -0,0 +1,150 @@
+# pdf_fpdf.py - classes FPDF (relatório de vendas e cartelas cartela a cartela).
+# Ficam fora do app.py para o fpdf (~0,5s de import) só carregar quando um PDF
+# é gerado: `from pdf_fpdf import PDFCartelas` dentro da função que usa.
+
+import re
+from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+
+class PDF(FPDF):
+    def __init__(self, evento_nome='N/A', colaborador_nome='N/A'):
+        super().__init__(orientation='L', unit='mm', format='A4') # 'L' = Paisagem
+        # Remove acentos para o FPDF (que usa 'latin-1')
+        def clean_text_for_pdf(text):
+            if not text: return "N/A"
+            text = str(text)
+            text = re.sub(r'[áàâãä]', 'a', text, flags=re.IGNORECASE)
+            text = re.sub(r'[éèêë]', 'e', text, flags=re.IGNORECASE)
+            text = re.sub(r'[íìîï]', 'i', text, flags=re.IGNORECASE)
+            text = re.sub(r'[óòôõö]', 'o', text, flags=re.IGNORECASE)
+            text = re.sub(r'[úùûü]', 'u', text, flags=re.IGNORECASE)
+            text = re.sub(r'[ç]', 'c', text, flags=re.IGNORECASE)
+            # Remove caracteres não-latin1
+            return text.encode('latin-1', 'ignore').decode('latin-1')
+
+        self.evento_nome = clean_text_for_pdf(evento_nome)
+        self.colaborador_nome = clean_text_for_pdf(colaborador_nome)
+
+    def header(self):
+        self.set_font('Helvetica', 'B', 15) 
+        self.cell(0, 10, f'Relatorio de Vendas - {self.evento_nome}', border=0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C') 
+        self.set_font('Helvetica', '', 10) 
+        self.cell(0, 5, f"Colaborador: {self.colaborador_nome}", border=0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C') 
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Helvetica', 'I', 8) 
+        self.cell(0, 10, 'Pagina ' + str(self.page_no()) + '/{nb}', border=0, new_x=XPos.RIGHT, new_y=YPos.TOP, align='C') 
+# --- FIM DA CLASSE PDF ---
+
+class PDFCartelas(FPDF):
+    """Classe FPDF customizada para gerar cartelas de Bingo."""
+    
+    def header(self):
+        # Verifica se foram passados dados personalizados, senão usa padrão
+        titulo = getattr(self, 'nome_sala', 'Cartelas de Bingo')
+        subtitulo = getattr(self, 'infos_evento', '')
+
+        self.set_font('Helvetica', 'B', 14) 
+        # Imprime Nome da Sala
+        self.cell(0, 6, titulo, border=0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C') 
+        
+        # Imprime Detalhes do Evento (se houver)
+        if subtitulo:
+            self.set_font('Helvetica', 'B', 10)
+            self.cell(0, 5, subtitulo, border=0, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C') 
+        
+        self.ln(2) # Pequeno espaço após o cabeçalho
+
+    def footer(self):
+        self.set_y(-10) # Rodapé mais curto para caber 5 linhas de cartela
+        self.set_font('Helvetica', 'I', 8) 
+        self.cell(0, 10, 'Pagina ' + str(self.page_no()) + '/{nb}', border=0, new_x=XPos.RIGHT, new_y=YPos.TOP, align='C') 
+        
+    def desenhar_cartela(self, numero_cartela, dados_cartela_2d, pos_x, pos_y):
+        """
+        Desenha uma cartela de 25 números (5x5) na posição (x, y).
+        Layout ajustado para caber 6 por página.
+        """
+        # --- Título da Cartela ---
+        self.set_xy(pos_x, pos_y)
+        self.set_font('Helvetica', 'B', 10) 
+        largura_total_cartela = 70 
+        # Altura do título
+        self.cell(largura_total_cartela, 6, f"Cartela N {numero_cartela:04d}", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C') 
+        
+        # --- Cabeçalho B-I-N-G-O ---
+        self.set_x(pos_x) 
+        self.set_font('Helvetica', 'B', 14) 
+        self.set_fill_color(230, 230, 230) 
+        
+        cell_width = 14 
+        cell_height_header = 8 
+        
+        cabecalho = ["B", "I", "N", "G", "O"]
+        for letra in cabecalho:
+             new_x = XPos.LMARGIN if letra == "O" else XPos.RIGHT
+             new_y = YPos.NEXT if letra == "O" else YPos.TOP
+             self.cell(cell_width, cell_height_header, letra, border=1, new_x=new_x, new_y=new_y, align='C', fill=True)
+        
+        # --- Números da Cartela (5 Linhas) ---
+        self.set_font('Helvetica', 'B', 12) 
+        cell_height_num = 10 
+        
+        for i in range(5): 
+            self.set_x(pos_x) 
+            for j in range(5): 
+                numero = str(dados_cartela_2d[i][j])
+                
+                # Destaque para o FREE (se houver)
+                if numero.upper() == "FREE":
+                    self.set_font('Helvetica', 'B', 10) # Fonte menor para caber
+                else:
+                    self.set_font('Helvetica', 'B', 12)
+
+                self.cell(cell_width, cell_height_num, numero, border=1, new_x=XPos.RIGHT, new_y=YPos.TOP, align='C') 
+            
+            self.ln(cell_height_num)
+
+    def desenhar_cartela_15(self, numero_cartela, dados_cartela_2d, pos_x, pos_y):
+        """
+        Desenha uma cartela de 15 números (3x5) na posição (x, y).
+        Otimizada para economizar espaço vertical.
+        """
+        # --- Título da Cartela ---
+        self.set_xy(pos_x, pos_y)
+        self.set_font('Helvetica', 'B', 9) # Fonte levemente menor
+        largura_total_cartela = 70 
+        # Altura reduzida do título da cartela para 5mm
+        self.cell(largura_total_cartela, 5, f"Cartela N {numero_cartela:04d}", border=1, new_x=XPos.LMARGIN, new_y=YPos.NEXT, align='C') 
+        
+        # --- Cabeçalho B-I-N-G-O ---
+        self.set_x(pos_x) 
+        self.set_font('Helvetica', 'B', 12) 
+        self.set_fill_color(230, 230, 230) 
+        
+        cell_width = 14 
+        cell_height_header = 6 # Altura reduzida do cabeçalho BINGO
+        
+        cabecalho = ["B", "I", "N", "G", "O"]
+        for letra in cabecalho:
+             new_x = XPos.LMARGIN if letra == "O" else XPos.RIGHT
+             new_y = YPos.NEXT if letra == "O" else YPos.TOP
+             self.cell(cell_width, cell_height_header, letra, border=1, new_x=new_x, new_y=new_y, align='C', fill=True)
+        
+        # --- Números da Cartela (3 Linhas) ---
+        self.set_font('Helvetica', 'B', 11) 
+        cell_height_num = 9 # Altura reduzida das células de número
+        
+        for i in range(3): 
+            self.set_x(pos_x) 
+            for j in range(5): 
+                numero = str(dados_cartela_2d[i][j])
+                self.cell(cell_width, cell_height_num, numero, border=1, new_x=XPos.RIGHT, new_y=YPos.TOP, align='C') 
+            
+            self.ln(cell_height_num) 
+
+
+# --- FIM DA CLASSE PDFCartelas ---
@@ -0,0 +1,177 @@
+# Testes do alocador de IDs em blocos (hi/lo) e da persistência dos blocos em SQLite.
+# Precisam de um mongod local (sem TLS): MONGODB_URI_TESTE, padrão mongodb://127.0.0.1:27017.
+# Cada teste usa um banco descartável, apagado no fim. Sem mongod, os testes são pulados.
+#   MONGODB_URI_TESTE=mongodb://127.0.0.1:27017 python -m pytest -q test_alocador_ids.py
+
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from pymongo import MongoClient
+
+MONGODB_URI_TESTE = os.environ.get('MONGODB_URI_TESTE', 'mongodb://127.0.0.1:27017')
+# O app nunca deve falar com o cluster de produção durante os testes
+os.environ.setdefault('MONGODB_URI_CONTROL', MONGODB_URI_TESTE)
+os.environ.setdefault('MONGO_TLS', '0')
+os.environ.setdefault('JOBS_WORKER', '0')
+
+import app  # noqa: E402
+
+SALA = '001'
+SEQUENCIA = 'id_vendas_global'
+
+
+def _mongod_disponivel():
+    client = MongoClient(MONGODB_URI_TESTE, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+pytestmark = pytest.mark.skipif(not _mongod_disponivel(), reason=f"mongod indisponível em {MONGODB_URI_TESTE}")
+
+
+@pytest.fixture
+def nome_db():
+    nome = f"teste_ids_{uuid.uuid4().hex[:12]}"
+    yield nome
+    client = MongoClient(MONGODB_URI_TESTE)
+    client.drop_database(nome)
+    client.close()
+
+
+@pytest.fixture
+def caminho_banco(tmp_path):
+    return str(tmp_path / 'blocos.sqlite3')
+
+
+def _contador(nome_db):
+    client = MongoClient(MONGODB_URI_TESTE)
+    try:
+        return client[nome_db].contadores.find_one({'_id': SEQUENCIA})['sequence_value']
+    finally:
+        client.close()
+
+
+def _esperar(condicao, segundos=10):
+    limite = time.monotonic() + segundos
+    while not condicao():
+        assert time.monotonic() < limite, "tempo esgotado"
+        time.sleep(0.05)
+
+
+def _blocos(caminho_banco):
+    conn = sqlite3.connect(caminho_banco)
+    try:
+        return conn.execute('SELECT token, pid, proximo, ultimo FROM blocos ORDER BY proximo').fetchall()
+    finally:
+        conn.close()
+
+
+def _alocar(caminho_banco, nome_db, quantidade, bloco, threads=1, adiantar=False):
+    """Executado em cada processo: um alocador novo (como um worker do gunicorn) entregando `quantidade` IDs."""
+    client = MongoClient(MONGODB_URI_TESTE)
+    db = client[nome_db]
+    alocador = app.AlocadorIdsEmBlocos(caminho_banco, adiantar=adiantar)
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            ids = list(executor.map(lambda _: alocador.proximo(db, SALA, SEQUENCIA, bloco), range(quantidade)))
+        # O bloco adiantado em andamento termina antes do processo sair (senão seria perdido)
+        _esperar(lambda: not alocador._adiantando)
+        return ids
+    finally:
+        client.close()
+
+
+def test_processos_concorrentes_sem_ids_repetidos(caminho_banco, nome_db):
+    processos, por_processo, bloco = 4, 230, 20
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+        futuros = [executor.submit(_alocar, caminho_banco, nome_db, por_processo, bloco, 4, True)
+                   for _ in range(processos)]
+        ids = [i for futuro in futuros for i in futuro.result()]
+
+    assert len(ids) == len(set(ids)) == processos * por_processo
+    contador = _contador(nome_db)
+    assert max(ids) <= contador
+    # Cada processo deixa no máximo o resto do bloco em uso e um bloco adiantado
+    assert contador - len(ids) < 2 * processos * bloco
+
+    # Os processos morreram: um alocador novo retoma as sobras deles antes de arrendar outro bloco
+    sobras = _alocar(caminho_banco, nome_db, contador - len(ids), bloco)
+    assert _contador(nome_db) == contador
+    assert sorted(ids + sobras) == list(range(1, contador + 1))
+
+
+def test_reinicio_retoma_o_bloco_em_andamento(caminho_banco, nome_db):
+    assert _alocar(caminho_banco, nome_db, 3, 10) == [1, 2, 3]
+    # Mesmo pid, outra instância (worker reiniciado): continua do bloco gravado, sem novo $inc
+    assert _alocar(caminho_banco, nome_db, 3, 10) == [4, 5, 6]
+    assert _contador(nome_db) == 10
+    # Esgota o bloco e segue para o próximo
+    assert _alocar(caminho_banco, nome_db, 6, 10) == [7, 8, 9, 10, 11, 12]
+    assert _contador(nome_db) == 20
+
+
+def test_bloco_de_processo_morto_e_retomado(caminho_banco, nome_db):
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+        pid_filho = executor.submit(os.getpid).result()
+        assert executor.submit(_alocar, caminho_banco, nome_db, 4, 10).result() == [1, 2, 3, 4]
+    # O filho morreu com o bloco 1-10 pela metade
+    conn = sqlite3.connect(caminho_banco)
+    try:
+        assert conn.execute('SELECT pid, proximo, ultimo FROM blocos').fetchall() == [(pid_filho, 5, 10)]
+    finally:
+        conn.close()
+
+    assert _alocar(caminho_banco, nome_db, 7, 10) == [5, 6, 7, 8, 9, 10, 11]
+    assert _contador(nome_db) == 20
+
+
+def test_bloco_de_processo_vivo_nao_e_retomado(caminho_banco, nome_db):
+    assert _alocar(caminho_banco, nome_db, 1, 10) == [1]
+    # Outro processo vivo (o pai do pytest) como dono do bloco em andamento
+    conn = sqlite3.connect(caminho_banco)
+    try:
+        conn.execute('UPDATE blocos SET token = ?, pid = ?', ('outro', os.getppid()))
+        conn.commit()
+    finally:
+        conn.close()
+
+    assert _alocar(caminho_banco, nome_db, 2, 10) == [11, 12]
+    assert _contador(nome_db) == 20
+
+
+class _MongoTravado:
+    """Banco cujo contador nunca responde: se a entrega do ID for ao Mongo, o teste falha."""
+
+    @property
+    def contadores(self):
+        raise AssertionError("o ID esperou o Mongo")
+
+
+def test_proximo_bloco_e_arrendado_adiantado(caminho_banco, nome_db):
+    client = MongoClient(MONGODB_URI_TESTE)
+    alocador = app.AlocadorIdsEmBlocos(caminho_banco)
+    try:
+        ids = [alocador.proximo(client[nome_db], SALA, SEQUENCIA, 10) for _ in range(4)]
+        assert _contador(nome_db) == 10  # Mais da metade do bloco ainda livre: nada adiantado
+        ids.append(alocador.proximo(client[nome_db], SALA, SEQUENCIA, 10))
+        _esperar(lambda: len(_blocos(caminho_banco)) == 2)
+        assert _contador(nome_db) == 20
+
+        # Com o Mongo travado, o resto do bloco e o adiantado inteiro saem do SQLite
+        ids += [alocador.proximo(_MongoTravado(), SALA, SEQUENCIA, 10) for _ in range(15)]
+        _esperar(lambda: not alocador._adiantando)
+    finally:
+        client.close()
+    assert ids == list(range(1, 21))
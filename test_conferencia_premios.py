@@ -0,0 +1,147 @@
+# Testes do motor de conferência (bitsets + popcount) e da sessão do sorteio ao vivo (índice CSR),
+# comparados com um conferidor ingênuo por conjuntos. Não precisam de Mongo: as cartelas são
+# geradas (com semente) numa pasta temporária.
+#   python -m pytest -q test_conferencia_premios.py
+
+import os
+import random
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('MONGODB_URI_CONTROL', os.environ.get('MONGODB_URI_TESTE', 'mongodb://127.0.0.1:27017'))
+os.environ.setdefault('MONGO_TLS', '0')
+os.environ.setdefault('JOBS_WORKER', '0')
+
+import app  # noqa: E402
+
+QUANTIDADE_POR_TIPO = {15: 600, 25: 500}
+
+
+@pytest.fixture(scope='module')
+def cartelas(tmp_path_factory):
+    """{tipo: matriz gerada} com os arquivos gravados numa pasta própria (stores do app isolados)."""
+    pasta = tmp_path_factory.mktemp('cartelas')
+    matrizes = {}
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(app, 'CARTELAS_FOLDER', str(pasta))
+        mp.setattr(app, '_CARTELAS_STORES', {})
+        mp.setattr(app, '_MOTORES_CONFERENCIA', {})
+        for tipo, quantidade in QUANTIDADE_POR_TIPO.items():
+            matrizes[tipo] = app.gerar_cartelas(tipo, quantidade, semente=tipo)
+            app.gravar_cartelas_txt(matrizes[tipo], app.caminho_arquivo_cartelas(tipo))
+        yield matrizes
+
+
+def _linhas_cartela(numeros, tipo):
+    """Conjuntos de cada linha (o arquivo grava a cartela coluna a coluna; 0 = FREE)."""
+    linhas = app.LINHAS_POR_TIPO_CARTELA[tipo]
+    return [{int(numeros[j * linhas + i]) for j in range(5)} for i in range(linhas)]
+
+
+def _indices_vendidos(vendas):
+    """Índices (base 0) das faixas das vendas (numero_inicial..final e o período do rollover)."""
+    vendidos = set()
+    for inicial, final, inicial2, final2 in vendas:
+        vendidos.update(range(inicial - 1, final))
+        if inicial2:
+            vendidos.update(range(inicial2 - 1, final2))
+    return np.array(sorted(vendidos), dtype=np.int64)
+
+
+def _categorias(quantidade_de_linhas):
+    return ['quadra'] + [f'linha_{n}' for n in range(1, quantidade_de_linhas + 1)] + ['bingo']
+
+
+def _detem(linhas, marcadas, categoria):
+    completas = sum(linha <= marcadas for linha in linhas)
+    if categoria == 'quadra':
+        return any(len(linha & marcadas) >= 4 for linha in linhas)
+    if categoria == 'bingo':
+        return completas == len(linhas)
+    return completas >= int(categoria.split('_')[1])
+
+
+def conferir_ingenuo(matriz, tipo, bolas, vendidos, quantidade_de_linhas):
+    """Bola a bola: primeiro prefixo do sorteio em que alguma cartela vendida detém cada prêmio."""
+    cartelas = {int(i): _linhas_cartela(matriz[i], tipo) for i in vendidos}
+    resultado = {c: None for c in _categorias(quantidade_de_linhas) + ['segundo_bingo']}
+    marcadas = {app.CARTELA_VALOR_FREE}
+    for ordem, bola in enumerate(bolas, start=1):
+        marcadas.add(bola)
+        for categoria in _categorias(quantidade_de_linhas):
+            if resultado[categoria] is None:
+                ganhadoras = [i + 1 for i, linhas in cartelas.items() if _detem(linhas, marcadas, categoria)]
+                if ganhadoras:
+                    resultado[categoria] = {'ordem': ordem, 'bola': bola, 'cartelas': sorted(ganhadoras)}
+        bingo = resultado['bingo']
+        if bingo and bingo['ordem'] < ordem and resultado['segundo_bingo'] is None:
+            ganhadoras = [i + 1 for i, linhas in cartelas.items()
+                          if i + 1 not in bingo['cartelas'] and _detem(linhas, marcadas, 'bingo')]
+            if ganhadoras:
+                resultado['segundo_bingo'] = {'ordem': ordem, 'bola': bola, 'cartelas': sorted(ganhadoras)}
+    return resultado
+
+
+def _cenarios(tipo):
+    """(semente, vendas, quantidade de bolas, linhas premiadas): inclui venda com dois períodos."""
+    n = QUANTIDADE_POR_TIPO[tipo]
+    bola_maxima = app.BOLA_MAXIMA_POR_TIPO[tipo]
+    linhas = app.LINHAS_POR_TIPO_CARTELA[tipo]
+    return [
+        (1, [(1, n, 0, 0)], bola_maxima, 1),
+        (2, [(21, 60, 0, 0), (n - 29, n, 1, 15)], bola_maxima, linhas - 1),  # rollover: fim + começo
+        (3, [(101, 180, 0, 0), (n - 4, n, 1, 3)], bola_maxima, linhas),
+        (4, [(1, n, 0, 0)], bola_maxima // 3, 2),  # sorteio curto: nem todos os prêmios saem
+        (5, [(7, 7, 0, 0)], bola_maxima, 1),
+    ]
+
+
+def _sorteio(semente, bola_maxima, quantidade):
+    bolas = list(range(1, bola_maxima + 1))
+    random.Random(semente).shuffle(bolas)
+    return bolas[:quantidade]
+
+
+@pytest.mark.parametrize('tipo', [15, 25])
+def test_motor_confere_igual_ao_ingenuo(cartelas, tipo):
+    motor = app.MotorConferencia(tipo, app.obter_store_cartelas(tipo))
+    for semente, vendas, quantidade_bolas, quantidade_de_linhas in _cenarios(tipo):
+        bolas = _sorteio(semente, app.BOLA_MAXIMA_POR_TIPO[tipo], quantidade_bolas)
+        vendidos = _indices_vendidos(vendas)
+        esperado = conferir_ingenuo(cartelas[tipo], tipo, bolas, vendidos, quantidade_de_linhas)
+        assert motor.conferir(bolas, vendidos, quantidade_de_linhas) == esperado, f"semente {semente}"
+
+
+@pytest.mark.parametrize('tipo', [15, 25])
+def test_sessao_sorteio_igual_ao_ingenuo_bola_a_bola(cartelas, tipo):
+    motor = app.MotorConferencia(tipo, app.obter_store_cartelas(tipo))
+    for semente, vendas, quantidade_bolas, quantidade_de_linhas in _cenarios(tipo):
+        bolas = _sorteio(semente, app.BOLA_MAXIMA_POR_TIPO[tipo], quantidade_bolas)
+        vendidos = _indices_vendidos(vendas)
+        sessao = app.SessaoSorteio(motor, vendidos, quantidade_de_linhas)
+        for ordem in range(1, len(bolas) + 1):
+            sessao.registrar_bola(bolas[ordem - 1])
+            if ordem % 10 == 0 or ordem == len(bolas):
+                esperado = conferir_ingenuo(cartelas[tipo], tipo, bolas[:ordem], vendidos, quantidade_de_linhas)
+                assert sessao.ganhadores == esperado, f"semente {semente}, bola {ordem}"
+
+
+@pytest.mark.parametrize('tipo', [15, 25])
+def test_sessao_faltam_para_o_bingo(cartelas, tipo):
+    motor = app.MotorConferencia(tipo, app.obter_store_cartelas(tipo))
+    vendidos = _indices_vendidos([(1, 50, 0, 0), (QUANTIDADE_POR_TIPO[tipo] - 9, QUANTIDADE_POR_TIPO[tipo], 1, 5)])
+    bolas = _sorteio(9, app.BOLA_MAXIMA_POR_TIPO[tipo], 30)
+    sessao = app.SessaoSorteio(motor, vendidos)
+    for bola in bolas:
+        sessao.registrar_bola(bola)
+
+    marcadas = set(bolas) | {app.CARTELA_VALOR_FREE}
+    esperado = [len(set(map(int, cartelas[tipo][i])) - marcadas) for i in vendidos]
+    assert sessao.faltam('bingo').tolist() == esperado
+
+    # Top-K: as 5 menores faltas, em ordem (empates no limite podem trazer qualquer uma das empatadas)
+    _, proximas = sessao.mais_proximas(k=5, categoria='bingo')
+    falta_por_cartela = {int(i) + 1: falta for falta, i in zip(esperado, vendidos)}
+    assert [p['faltam'] for p in proximas] == sorted(esperado)[:5]
+    assert all(falta_por_cartela[p['cartela']] == p['faltam'] for p in proximas)
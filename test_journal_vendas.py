@@ -0,0 +1,153 @@
+# Testes do journal de vendas (VENDA_JOURNAL): descarga idempotente para o Mongo, retomada
+# depois de uma queda e conciliação que respeita as vendas excluídas.
+# Precisam de um mongod local (sem TLS): MONGODB_URI_TESTE, padrão mongodb://127.0.0.1:27017.
+# Cada teste usa um banco descartável, apagado no fim. Sem mongod, os testes são pulados.
+#   MONGODB_URI_TESTE=mongodb://127.0.0.1:27017 python -m pytest -q test_journal_vendas.py
+
+import os
+import uuid
+
+import pytest
+from bson.decimal128 import Decimal128
+from pymongo import MongoClient
+
+MONGODB_URI_TESTE = os.environ.get('MONGODB_URI_TESTE', 'mongodb://127.0.0.1:27017')
+# O app nunca deve falar com o cluster de produção durante os testes
+os.environ.setdefault('MONGODB_URI_CONTROL', MONGODB_URI_TESTE)
+os.environ.setdefault('MONGO_TLS', '0')
+os.environ.setdefault('JOBS_WORKER', '0')
+
+import app  # noqa: E402
+
+SALA = '001'
+ID_EVENTO = 1
+
+
+def _mongod_disponivel():
+    client = MongoClient(MONGODB_URI_TESTE, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+pytestmark = pytest.mark.skipif(not _mongod_disponivel(), reason=f"mongod indisponível em {MONGODB_URI_TESTE}")
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """Banco descartável no lugar do banco de vendas da sala."""
+    nome = f"teste_journal_{uuid.uuid4().hex[:12]}"
+    client = MongoClient(MONGODB_URI_TESTE)
+    monkeypatch.setattr(app, 'get_vendas_db', lambda: client[nome])
+    yield client[nome]
+    client.drop_database(nome)
+    client.close()
+
+
+@pytest.fixture
+def caminho_journal(tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'journal' / 'vendas.sqlite3')
+    monkeypatch.setattr(app, 'journal_vendas', app.JournalVendas(caminho))
+    return caminho
+
+
+def _reiniciar(monkeypatch, caminho_journal):
+    """Processo novo: outra instância do journal sobre o mesmo arquivo."""
+    monkeypatch.setattr(app, 'journal_vendas', app.JournalVendas(caminho_journal))
+
+
+def _venda(n, id_cliente=None):
+    return {
+        'id_venda': f"V{n:05d}", 'id_evento': ID_EVENTO, 'id_cliente': n if id_cliente is None else id_cliente,
+        'nome_cliente': f"Cliente {n}", 'quantidade_unidades': 1, 'quantidade_cartelas': 10,
+        'numero_inicial': n * 10 + 1, 'numero_final': n * 10 + 10, 'numero_inicial2': 0, 'numero_final2': 0,
+        'valor_total': Decimal128('5.00'),
+    }
+
+
+def _registrar(vendas):
+    for venda in vendas:
+        app.journal_vendas.registrar(SALA, venda, usa_resumo=True)
+
+
+def _estados():
+    return {linha['id_venda']: linha['estado'] for linha in app.journal_vendas.todas()}
+
+
+def _descarregar_tudo():
+    gravadas, com_erro = app.descarregar_journal_vendas()
+    assert com_erro == 0
+    return gravadas
+
+
+def _conciliar(*args):
+    resultado = app.app.test_cli_runner().invoke(args=['vendas', 'journal-conciliar', *args])
+    assert resultado.exception is None or resultado.exit_code == 1, resultado.output
+    return resultado
+
+
+def test_reenvio_das_mesmas_linhas_nao_duplica(db, caminho_journal):
+    vendas = [_venda(n, id_cliente=n % 3) for n in range(1, 13)]
+    _registrar(vendas)
+    assert _descarregar_tudo() == len(vendas)
+
+    # Queda entre o bulk_write e a marcação: as mesmas linhas voltam à fila e vão de novo
+    app.journal_vendas.reabrir(SALA, [venda['id_venda'] for venda in vendas])
+    assert _descarregar_tudo() == len(vendas)
+
+    colecao = db[f"vendas{ID_EVENTO}"]
+    assert sorted(v['id_venda'] for v in colecao.find()) == sorted(v['id_venda'] for v in vendas)
+    assert any(indice.get('unique') for indice in colecao.index_information().values())
+    for id_cliente in range(3):
+        resumo = db.resumo_vendas_cliente.find_one({'_id': app._chave_resumo(ID_EVENTO, id_cliente)})
+        do_cliente = [v for v in vendas if v['id_cliente'] == id_cliente]
+        assert sorted(v['id_venda'] for v in resumo['vendas']) == sorted(v['id_venda'] for v in do_cliente)
+        assert resumo['quantidade_cartelas'] == 10 * len(do_cliente)
+    assert set(_estados().values()) == {'gravada'}
+
+
+def test_venda_pendente_antes_da_queda_e_enviada_no_reinicio(db, caminho_journal, monkeypatch):
+    vendas = [_venda(n) for n in range(1, 6)]
+    _registrar(vendas)
+    # Uma delas chegou ao Mongo antes da queda, mas não foi marcada como gravada
+    db[f"vendas{ID_EVENTO}"].insert_one(dict(vendas[0]))
+
+    _reiniciar(monkeypatch, caminho_journal)
+    assert set(_estados().values()) == {'pendente'}
+    assert _descarregar_tudo() == len(vendas)
+
+    assert sorted(v['id_venda'] for v in db[f"vendas{ID_EVENTO}"].find()) == [v['id_venda'] for v in vendas]
+    assert set(_estados().values()) == {'gravada'}
+    assert _descarregar_tudo() == 0
+
+
+def test_venda_excluida_nao_volta_na_conciliacao(db, caminho_journal):
+    excluida, perdida, mantida = _venda(1), _venda(2), _venda(3)
+    _registrar([excluida, perdida, mantida])
+    assert _descarregar_tudo() == 3
+
+    colecao = f"vendas{ID_EVENTO}"
+    # Exclusão pelo admin (como na rota de exclusão): some do Mongo e ganha lápide no journal
+    assert app.excluir_venda_com_resumo(db, colecao, db[colecao].find_one({'id_venda': excluida['id_venda']})) == 1
+    app.journal_vendas.marcar_excluida(SALA, excluida['id_venda'])
+    # A outra some sem lápide: essa a conciliação deve reenviar
+    db[colecao].delete_one({'id_venda': perdida['id_venda']})
+
+    resultado = _conciliar('--reenviar')
+    assert "1 ausente(s)" in resultado.output and "1 excluída(s)" in resultado.output
+    assert _estados() == {excluida['id_venda']: 'excluida', perdida['id_venda']: 'pendente',
+                          mantida['id_venda']: 'gravada'}
+
+    assert _descarregar_tudo() == 1
+    assert sorted(v['id_venda'] for v in db[colecao].find()) == [perdida['id_venda'], mantida['id_venda']]
+    resumo = db.resumo_vendas_cliente.find_one({'_id': app._chave_resumo(ID_EVENTO, excluida['id_cliente'])})
+    assert resumo is None or excluida['id_venda'] not in [v['id_venda'] for v in resumo['vendas']]
+
+    # Conciliar de novo não muda nada
+    resultado = _conciliar('--reenviar')
+    assert resultado.exit_code == 0, resultado.output
+    assert _estados()[excluida['id_venda']] == 'excluida'
@@ -0,0 +1,81 @@
+# Testes do PDF de cartelas: renderização em paralelo (gerar_paralelo) igual, byte a byte, à em série.
+# Não precisam de Mongo; usam cartelas/cartelas.15 do repositório.
+#   python -m pytest -q test_pdf_cartelas.py
+
+import multiprocessing
+import os
+import re
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import pytest
+
+os.environ.setdefault('MONGODB_URI_CONTROL', os.environ.get('MONGODB_URI_TESTE', 'mongodb://127.0.0.1:27017'))
+os.environ.setdefault('MONGO_TLS', '0')
+os.environ.setdefault('JOBS_WORKER', '0')
+
+import app  # noqa: E402
+
+TIPO = 15
+CRIADO_EM = datetime(2026, 1, 2, 3, 4, 5)
+PERIODOS = [(1, 3000), (5001, 8200)]  # Dois períodos: o 2º começa no meio de uma página
+INFOS_EVENTO = "Evento de teste - 02/01/2026 as 20:00"
+
+pytestmark = pytest.mark.skipif(not os.path.exists(app.caminho_arquivo_cartelas(TIPO)),
+                                reason=f"cartelas.{TIPO} ausente")
+
+
+@pytest.fixture(scope='module')
+def pool():
+    # 'spawn' como nos executores de jobs: os filhos importam o app do zero
+    executor = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context('spawn'))
+    yield executor
+    executor.shutdown(wait=True)
+
+
+def _escritor(periodos, comprimir):
+    total = app.contar_cartelas_periodos(periodos)
+    return app.PDFCartelasStream(TIPO, "Sala Teste", INFOS_EVENTO, total, comprimir=comprimir, criado_em=CRIADO_EM)
+
+
+def _pdf_serial(periodos, comprimir=True):
+    escritor = _escritor(periodos, comprimir)
+    return b''.join(escritor.gerar(app.buscar_dados_cartelas_periodos(periodos, TIPO)))
+
+
+def _pdf_paralelo(periodos, pool, comprimir=True, paginas_por_tarefa=7):
+    escritor = _escritor(periodos, comprimir)
+    return b''.join(escritor.gerar_paralelo(periodos, pool, 2, paginas_por_tarefa=paginas_por_tarefa))
+
+
+def _rodapes(pdf, comprimir=True):
+    """Textos "Pagina x/N" de cada página, na ordem dos streams de conteúdo."""
+    streams = re.findall(rb'stream\n(.*?)\nendstream', pdf, re.S)
+    conteudos = [zlib.decompress(s) if comprimir else s for s in streams]
+    return [m.decode() for c in conteudos for m in re.findall(rb'\((Pagina \d+/\d+)\)', c)]
+
+
+def test_data_de_criacao_injetada():
+    pdf = _pdf_serial([(1, 10)])
+    assert b'/CreationDate (D:20260102030405Z)' in pdf
+    assert pdf == _pdf_serial([(1, 10)])
+
+
+@pytest.mark.parametrize('comprimir', [True, False])
+def test_paralelo_igual_ao_serial_com_dois_periodos(pool, comprimir):
+    serial = _pdf_serial(PERIODOS, comprimir)
+    assert _pdf_paralelo(PERIODOS, pool, comprimir) == serial
+
+    total_paginas = -(-app.contar_cartelas_periodos(PERIODOS) // len(app.obter_layout_cartelas(TIPO)['posicoes']))
+    assert _rodapes(serial, comprimir) == [f"Pagina {n}/{total_paginas}" for n in range(1, total_paginas + 1)]
+
+
+@pytest.mark.parametrize('paginas_por_tarefa', [1, 100, 10_000])
+def test_paralelo_independe_do_tamanho_do_bloco(pool, paginas_por_tarefa):
+    periodos = [(10, 700), (900, 905), (2000, 2600)]
+    assert _pdf_paralelo(periodos, pool, paginas_por_tarefa=paginas_por_tarefa) == _pdf_serial(periodos)
+
+
+def test_paralelo_sem_cartelas(pool):
+    assert _pdf_paralelo([], pool) == _pdf_serial([])
@@ -0,0 +1,110 @@
+# Testes do resumo de vendas por cliente (resumo_vendas_cliente) com vendas simultâneas.
+# Precisam de um mongod local (sem TLS): MONGODB_URI_TESTE, padrão mongodb://127.0.0.1:27017.
+# Cada teste usa um banco descartável, apagado no fim. Sem mongod, os testes são pulados.
+#   MONGODB_URI_TESTE=mongodb://127.0.0.1:27017 python -m pytest -q test_resumo_vendas.py
+
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from bson.decimal128 import Decimal128
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+
+MONGODB_URI_TESTE = os.environ.get('MONGODB_URI_TESTE', 'mongodb://127.0.0.1:27017')
+# O app nunca deve falar com o cluster de produção durante os testes
+os.environ.setdefault('MONGODB_URI_CONTROL', MONGODB_URI_TESTE)
+os.environ.setdefault('MONGO_TLS', '0')
+os.environ.setdefault('JOBS_WORKER', '0')
+
+import app  # noqa: E402
+
+ID_EVENTO = 1
+CLIENTES = 40  # Cada cliente recebe duas "primeiras vendas" ao mesmo tempo
+
+
+def _mongod_disponivel():
+    client = MongoClient(MONGODB_URI_TESTE, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+pytestmark = pytest.mark.skipif(not _mongod_disponivel(), reason=f"mongod indisponível em {MONGODB_URI_TESTE}")
+
+
+@pytest.fixture
+def dbs():
+    """Dois clients (como dois workers) para o mesmo banco descartável."""
+    nome = f"teste_resumo_{uuid.uuid4().hex[:12]}"
+    clients = [MongoClient(MONGODB_URI_TESTE) for _ in range(2)]
+    yield [client[nome] for client in clients]
+    clients[0].drop_database(nome)
+    for client in clients:
+        client.close()
+
+
+def _venda(id_cliente, ordem):
+    inicial = (id_cliente * 2 + ordem) * 10 + 1
+    return {
+        'id_venda': f"V{id_cliente:03d}{ordem}", 'id_evento': ID_EVENTO, 'id_cliente': id_cliente,
+        'nome_cliente': f"Cliente {id_cliente}", 'quantidade_unidades': 1, 'quantidade_cartelas': 10,
+        'numero_inicial': inicial, 'numero_final': inicial + 9, 'numero_inicial2': 0, 'numero_final2': 0,
+        'valor_total': Decimal128('5.00'),
+    }
+
+
+def _conferir_resumos(db):
+    for id_cliente in range(CLIENTES):
+        resumo = db.resumo_vendas_cliente.find_one({'_id': app._chave_resumo(ID_EVENTO, id_cliente)})
+        assert resumo is not None
+        assert sorted(v['id_venda'] for v in resumo['vendas']) == [_venda(id_cliente, 0)['id_venda'],
+                                                                   _venda(id_cliente, 1)['id_venda']]
+        assert resumo['quantidade_unidades'] == 2
+        assert resumo['quantidade_cartelas'] == 20
+        assert resumo['valor_total'].to_decimal() == 10
+
+
+def _em_paralelo(dbs, aplicar):
+    """Para cada cliente, as duas vendas saem juntas, uma por client (barreira antes de escrever)."""
+    def worker(ordem):
+        for id_cliente in range(CLIENTES):
+            barreira.wait()
+            aplicar(dbs[ordem], _venda(id_cliente, ordem))
+
+    barreira = threading.Barrier(2)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        for futuro in [executor.submit(worker, ordem) for ordem in range(2)]:
+            futuro.result()
+
+
+def test_primeiras_vendas_simultaneas_entram_no_resumo(dbs):
+    _em_paralelo(dbs, app.aplicar_venda_no_resumo)
+    _conferir_resumos(dbs[0])
+
+
+def test_primeiras_vendas_simultaneas_em_lote(dbs):
+    # Caminho do lote e do journal: bulk_write de upserts + reaplicar_resumos_colididos
+    def aplicar(db, venda):
+        try:
+            db.resumo_vendas_cliente.bulk_write([UpdateOne(*app._operacao_resumo(venda), upsert=True)], ordered=False)
+        except BulkWriteError as e:
+            assert app.reaplicar_resumos_colididos(db, [venda], e) == []
+
+    _em_paralelo(dbs, aplicar)
+    _conferir_resumos(dbs[0])
+
+
+def test_reenvio_da_mesma_venda_nao_soma_duas_vezes(dbs):
+    db = dbs[0]
+    venda = _venda(0, 0)
+    for _ in range(3):
+        resumo = app.aplicar_venda_no_resumo(db, venda)
+    assert [v['id_venda'] for v in resumo['vendas']] == [venda['id_venda']]
+    assert resumo['quantidade_cartelas'] == 10
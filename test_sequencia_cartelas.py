@@ -0,0 +1,110 @@
+# Testes da numeração de cartelas sem trava (get_next_bilhete_sequence + calcular_faixas_venda).
+# Precisam de um mongod local (sem TLS): MONGODB_URI_TESTE, padrão mongodb://127.0.0.1:27017.
+# Cada teste usa um banco descartável, apagado no fim. Sem mongod, os testes são pulados.
+#   MONGODB_URI_TESTE=mongodb://127.0.0.1:27017 python -m pytest -q test_sequencia_cartelas.py
+
+import multiprocessing
+import os
+import random
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from pymongo import MongoClient
+
+MONGODB_URI_TESTE = os.environ.get('MONGODB_URI_TESTE', 'mongodb://127.0.0.1:27017')
+# O app nunca deve falar com o cluster de produção durante os testes
+os.environ.setdefault('MONGODB_URI_CONTROL', MONGODB_URI_TESTE)
+os.environ.setdefault('MONGO_TLS', '0')
+os.environ.setdefault('JOBS_WORKER', '0')
+
+import app  # noqa: E402
+
+ID_EVENTO = 1
+CAMPO = 'inicial_proxima_venda'
+
+
+def _mongod_disponivel():
+    client = MongoClient(MONGODB_URI_TESTE, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+pytestmark = pytest.mark.skipif(not _mongod_disponivel(), reason=f"mongod indisponível em {MONGODB_URI_TESTE}")
+
+
+@pytest.fixture
+def nome_db():
+    nome = f"teste_sequencia_{uuid.uuid4().hex[:12]}"
+    yield nome
+    client = MongoClient(MONGODB_URI_TESTE)
+    client.drop_database(nome)
+    client.close()
+
+
+def _reservar_faixas(nome_db, quantidades, threads, numero_inicial, limite):
+    """Executado em cada processo: reserva as faixas em `threads` threads, como um worker do gunicorn."""
+    client = MongoClient(MONGODB_URI_TESTE)
+    db = client[nome_db]
+
+    def reservar(quantidade):
+        inicial = app.get_next_bilhete_sequence(db, ID_EVENTO, CAMPO, quantidade, limite, valor_inicial=numero_inicial)
+        assert inicial is not None
+        return app.calcular_faixas_venda(inicial, quantidade, limite)
+
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return list(executor.map(reservar, quantidades))
+    finally:
+        client.close()
+
+
+@pytest.mark.parametrize('numero_inicial', [1, 101])
+def test_processos_concorrentes_sem_sobreposicao_nem_buracos(nome_db, numero_inicial):
+    processos, threads, vendas = 4, 4, 150
+    sorteio = random.Random(numero_inicial)
+    lotes = [[sorteio.randint(1, 30) for _ in range(vendas)] for _ in range(processos)]
+    # O limite é exatamente o total vendido: a última faixa termina no limite
+    limite = numero_inicial + sum(map(sum, lotes)) - 1
+
+    contexto = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processos, mp_context=contexto) as executor:
+        futuros = [executor.submit(_reservar_faixas, nome_db, lote, threads, numero_inicial, limite) for lote in lotes]
+        faixas = [faixa for futuro in futuros for faixa in futuro.result()]
+
+    assert len(faixas) == processos * vendas
+    assert all(inicial2 == 0 for _, _, inicial2, _ in faixas), "nenhuma venda deveria passar do limite"
+
+    sobrepostas, vistos = app.cartelas_sobrepostas(faixas)
+    assert sobrepostas == []
+    assert set(vistos) == set(range(numero_inicial, limite + 1))
+
+    client = MongoClient(MONGODB_URI_TESTE)
+    try:
+        controle = client[nome_db].controle_venda.find_one({'id_evento': ID_EVENTO})
+    finally:
+        client.close()
+    assert controle[CAMPO] == 1
+
+
+def test_contador_volta_para_1_exatamente_no_limite(nome_db):
+    client = MongoClient(MONGODB_URI_TESTE)
+    db = client[nome_db]
+    try:
+        def vender(quantidade):
+            inicial = app.get_next_bilhete_sequence(db, ID_EVENTO, CAMPO, quantidade, 100)
+            return app.calcular_faixas_venda(inicial, quantidade, 100)
+
+        assert vender(90) == (1, 90, 0, 0)
+        assert vender(10) == (91, 100, 0, 0)  # Termina no limite: não é rollover
+        assert db.controle_venda.find_one({'id_evento': ID_EVENTO})[CAMPO] == 1
+        assert vender(95) == (1, 95, 0, 0)
+        assert vender(10) == (96, 100, 1, 5)  # Passa do limite: a 2ª faixa recomeça em 1
+        assert vender(1) == (6, 6, 0, 0)
+    finally:
+        client.close()